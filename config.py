@@ -22,6 +22,12 @@ EDGE_STRIP_SIZE = 10
 LED_ORDER = ['top', 'right', 'bottom', 'left']
 REVERSE_EDGES = ['bottom', 'left']
 
+# Runtime Configuration
+# Optional JSON file overriding the geometry and LED strip settings in this file,
+# e.g. {"TV_WIDTH_CM": 65.0}. Changes are applied while running.
+CONFIG_FILE = "config.json"
+CONFIG_POLL_INTERVAL = 0.5  # Seconds between checks for config file changes
+
 # Debug Configuration
 DEBUG_MODE = True
 PRINT_COLOR_SUMMARY = True
@@ -0,0 +1,236 @@
+import json
+import math
+import os
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import config
+from controllers.ledcontrol import SamplerPlan, build_sampler_plan
+
+EDGES = ('top', 'right', 'bottom', 'left')
+
+# Settings that can be overridden in the config file, with their expected types
+RELOADABLE_SETTINGS = {
+    'TV_WIDTH_CM': (int, float),
+    'TV_HEIGHT_CM': (int, float),
+    'LEDS_PER_METER': int,
+    'FRAME_RESIZE_WIDTH': int,
+    'FRAME_RESIZE_HEIGHT': int,
+    'EDGE_STRIP_SIZE': int,
+    'LED_ORDER': list,
+    'REVERSE_EDGES': list,
+}
+
+# Upper bounds for the numeric settings; anything above is a typo, not a real setup
+SETTING_MAXIMUMS = {
+    'TV_WIDTH_CM': 1000,
+    'TV_HEIGHT_CM': 1000,
+    'LEDS_PER_METER': 1000,
+    'FRAME_RESIZE_WIDTH': 3840,
+    'FRAME_RESIZE_HEIGHT': 2160,
+    'EDGE_STRIP_SIZE': 2160,
+}
+
+class CompiledConfig(NamedTuple):
+    """
+    A validated configuration together with everything precomputed from it.
+
+    Instances are immutable and replaced as a whole on reload, so a frame that
+    grabbed one keeps a consistent view even if a reload happens mid-frame.
+
+    Attributes:
+        settings (dict): Validated setting values keyed by config.py name.
+        plan (SamplerPlan): Sampling regions for the configured geometry.
+        led_order (Tuple[str, ...]): Edge order along the strip.
+        reverse_edges (Tuple[str, ...]): Edges wired in reverse.
+        led_count (int): Total number of LEDs.
+    """
+    settings: Dict
+    plan: SamplerPlan
+    led_order: Tuple[str, ...]
+    reverse_edges: Tuple[str, ...]
+    led_count: int
+
+def default_settings() -> Dict:
+    """Return the reloadable settings as defined in config.py."""
+    return {name: getattr(config, name) for name in RELOADABLE_SETTINGS}
+
+def validate_settings(overrides: Dict) -> Dict:
+    """
+    Merge overrides onto the config.py defaults and validate the result.
+
+    Args:
+        overrides (dict): Setting values keyed by config.py name.
+
+    Returns:
+        dict: Complete, validated settings.
+
+    Raises:
+        ValueError: If a setting is unknown, has the wrong type or an invalid value.
+    """
+    if not isinstance(overrides, dict):
+        raise ValueError("Config file must contain a JSON object")
+
+    unknown = set(overrides) - set(RELOADABLE_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown config settings: {', '.join(sorted(unknown))}")
+
+    settings = default_settings()
+    settings.update(overrides)
+
+    for name, expected in RELOADABLE_SETTINGS.items():
+        value = settings[name]
+        if isinstance(value, bool) or not isinstance(value, expected):
+            raise ValueError(f"{name} has invalid type {type(value).__name__}")
+        if isinstance(value, float) and not math.isfinite(value):
+            raise ValueError(f"{name} must be a finite number, got {value}")
+        if isinstance(value, list) and not all(isinstance(item, str) and item in EDGES for item in value):
+            raise ValueError(f"{name} may only contain {', '.join(EDGES)}")
+
+    for name, maximum in SETTING_MAXIMUMS.items():
+        if not 0 < settings[name] <= maximum:
+            raise ValueError(f"{name} must be between 0 and {maximum}, got {settings[name]}")
+
+    if settings['EDGE_STRIP_SIZE'] > min(settings['FRAME_RESIZE_WIDTH'], settings['FRAME_RESIZE_HEIGHT']):
+        raise ValueError("EDGE_STRIP_SIZE must not exceed the resized frame dimensions")
+
+    if sorted(settings['LED_ORDER']) != sorted(EDGES):
+        raise ValueError(f"LED_ORDER must list each of {', '.join(EDGES)} exactly once")
+
+    # Every LED needs at least one pixel column/row to sample from
+    leds_top_bottom = int(settings['TV_WIDTH_CM'] / 100.0 * settings['LEDS_PER_METER'])
+    leds_left_right = int(settings['TV_HEIGHT_CM'] / 100.0 * settings['LEDS_PER_METER'])
+    if leds_top_bottom > settings['FRAME_RESIZE_WIDTH'] or leds_left_right > settings['FRAME_RESIZE_HEIGHT']:
+        raise ValueError("More LEDs per edge than pixels in the resized frame; increase FRAME_RESIZE_WIDTH/HEIGHT")
+
+    return settings
+
+def compile_config(settings: Dict) -> CompiledConfig:
+    """
+    Precompute the sampler plan and strip mapping for validated settings.
+
+    Args:
+        settings (dict): Settings returned by validate_settings.
+
+    Returns:
+        CompiledConfig: Ready-to-use configuration.
+    """
+    plan = build_sampler_plan(settings['TV_WIDTH_CM'], settings['TV_HEIGHT_CM'],
+                              settings['LEDS_PER_METER'], settings['FRAME_RESIZE_WIDTH'],
+                              settings['FRAME_RESIZE_HEIGHT'], settings['EDGE_STRIP_SIZE'])
+    led_count = sum(len(regions) for regions in plan.regions.values())
+    return CompiledConfig(settings, plan, tuple(settings['LED_ORDER']),
+                          tuple(settings['REVERSE_EDGES']), led_count)
+
+def load_config(path: str) -> CompiledConfig:
+    """
+    Load, validate and compile a config file. A missing file yields the config.py defaults.
+
+    Args:
+        path (str): Path to the JSON config file.
+
+    Returns:
+        CompiledConfig: Ready-to-use configuration.
+
+    Raises:
+        ValueError: If the file cannot be parsed or fails validation.
+    """
+    overrides = {}
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                overrides = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Could not parse config file {path}: {e}")
+    return compile_config(validate_settings(overrides))
+
+class ConfigWatcher:
+    """
+    Reloads a JSON config file whenever it changes.
+
+    The file is polled in a background thread. A changed file is validated and
+    compiled off the frame loop, then published by replacing `current` in a single
+    assignment, so pipelines reading `watcher.current` once per frame switch over
+    between frames without stalling or dropping output. An invalid file is reported
+    and the previous configuration stays in effect; at startup the config.py defaults
+    are used instead.
+
+    Args:
+        path (str): Path to the JSON config file.
+        poll_interval (float): Seconds between checks for changes.
+    """
+
+    def __init__(self, path: str = config.CONFIG_FILE,
+                 poll_interval: float = config.CONFIG_POLL_INTERVAL):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._stamp = self._get_stamp()
+        try:
+            self.current = load_config(path)
+        except (OSError, ValueError) as e:
+            print(f"Could not load config, using defaults: {e}")
+            self.current = compile_config(default_settings())
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _get_stamp(self) -> Optional[Tuple[int, int]]:
+        # Size is included because a truncate-then-write save can land in the same
+        # mtime tick as the truncated state a previous poll already saw
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self) -> bool:
+        """
+        Reload the config file if it changed since the last check.
+
+        Returns:
+            bool: True if a new configuration was swapped in.
+        """
+        stamp = self._get_stamp()
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+
+        try:
+            compiled = load_config(self.path)
+        except (OSError, ValueError) as e:
+            print(f"Config reload failed, keeping previous config: {e}")
+            return False
+
+        if compiled.settings == self.current.settings:
+            return False
+        self.current = compiled
+        print(f"Config reloaded from {self.path}: {compiled.led_count} LEDs")
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check()
+            except Exception as e:
+                # Keep watching; a later edit may fix whatever went wrong
+                print(f"Config reload failed, keeping previous config: {e}")
+
+    def start(self):
+        """Start watching in a background thread."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background thread."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,235 @@
+import os
+import time
+import numpy as np
+import cv2
+from typing import Optional, Tuple
+
+FRAMES_FILE = "frames.npy"
+TIMESTAMPS_FILE = "timestamps.npy"
+
+class FrameSource:
+    """
+    Base class for anything that produces frames for the LED pipeline.
+
+    Subclasses implement read() with the same contract as cv2.VideoCapture.read():
+    a (ret, frame) tuple where ret is False once no more frames are available.
+    """
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+class CameraSource(FrameSource):
+    """
+    Live frames from a camera via cv2.VideoCapture. Frames are BGR.
+
+    Args:
+        camera_index (int): Camera index (usually 0 for default camera).
+        target_fps (float): Capture FPS requested from the camera.
+        width (int): Requested capture width.
+        height (int): Requested capture height.
+    """
+
+    def __init__(self, camera_index: int = 0, target_fps: float = 30.0,
+                 width: int = 640, height: int = 480):
+        self.cap = cv2.VideoCapture(camera_index)
+        if not self.cap.isOpened():
+            raise ValueError(f"Could not open camera {camera_index}")
+
+        # Set camera properties for better performance
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.cap.set(cv2.CAP_PROP_FPS, target_fps)
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+class ScreenSource(FrameSource):
+    """
+    Screen capture frames via mss, converted from BGRA to RGB.
+
+    Args:
+        monitor_index (int): Monitor index to capture (0 for primary).
+    """
+
+    def __init__(self, monitor_index: int = 0):
+        try:
+            import mss
+        except ImportError:
+            raise ImportError("Screen capture requires 'mss' package. Install with: pip install mss")
+
+        self.sct = mss.mss()
+        monitors = self.sct.monitors
+        if monitor_index + 1 >= len(monitors):
+            self.sct.close()
+            raise ValueError(f"Monitor index {monitor_index} not available. Available monitors: {len(monitors)-1}")
+
+        self.monitor = monitors[monitor_index + 1]  # monitors[0] is all monitors combined
+
+    def read(self):
+        screenshot = self.sct.grab(self.monitor)
+        frame = np.array(screenshot)
+        return True, cv2.cvtColor(frame, cv2.COLOR_BGRA2RGB)
+
+    def release(self):
+        self.sct.close()
+
+class FrameRecorder:
+    """
+    Writes frames and their capture timestamps to a recording directory.
+
+    A recording is a directory holding two plain .npy arrays: frames.npy with shape
+    (N, H, W, C) uint8 and timestamps.npy with N float64 seconds relative to the first
+    frame. Plain .npy is used so ReplaySource can memory-map the frames instead of
+    decoding them, which keeps replay cost out of the measurements.
+
+    Frames are streamed to a raw scratch file while recording and converted to .npy
+    on close(), so long sessions do not have to fit in memory. All frames must share
+    the shape and dtype of the first one. If no frames were written, close() only
+    removes the scratch file and no recording is created.
+
+    Args:
+        path (str): Recording directory. Created if it does not exist.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._raw_path = os.path.join(path, FRAMES_FILE + ".part")
+        self._raw = open(self._raw_path, "wb")
+        self._shape = None
+        self._dtype = None
+        self._timestamps = []
+        self._start = None
+
+    def write(self, frame: np.ndarray, timestamp: Optional[float] = None):
+        if self._shape is None:
+            self._shape = frame.shape
+            self._dtype = frame.dtype
+        elif frame.shape != self._shape or frame.dtype != self._dtype:
+            raise ValueError(f"Frame shape {frame.shape} does not match recording shape {self._shape}")
+
+        now = timestamp if timestamp is not None else time.perf_counter()
+        if self._start is None:
+            self._start = now
+        self._timestamps.append(now - self._start)
+        self._raw.write(np.ascontiguousarray(frame).tobytes())
+
+    def close(self):
+        if self._raw is None:
+            return
+        self._raw.close()
+        self._raw = None
+
+        if self._shape is None:
+            os.remove(self._raw_path)
+            return
+
+        count = len(self._timestamps)
+        raw = np.memmap(self._raw_path, dtype=self._dtype, mode="r",
+                        shape=(count,) + tuple(self._shape))
+        frames = np.lib.format.open_memmap(os.path.join(self.path, FRAMES_FILE), mode="w+",
+                                           dtype=self._dtype, shape=raw.shape)
+        # Copy in chunks to keep memory use bounded
+        for start in range(0, count, 64):
+            frames[start:start + 64] = raw[start:start + 64]
+        frames.flush()
+        del frames, raw
+        os.remove(self._raw_path)
+
+        np.save(os.path.join(self.path, TIMESTAMPS_FILE), np.asarray(self._timestamps, dtype=np.float64))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class RecordingSource(FrameSource):
+    """
+    Wraps another FrameSource and records every frame it produces.
+
+    Args:
+        source (FrameSource): Source to read frames from.
+        path (str): Recording directory passed to FrameRecorder.
+    """
+
+    def __init__(self, source: FrameSource, path: str):
+        self.source = source
+        self.recorder = FrameRecorder(path)
+
+    def read(self):
+        ret, frame = self.source.read()
+        if ret:
+            self.recorder.write(frame)
+        return ret, frame
+
+    def release(self):
+        try:
+            self.source.release()
+        finally:
+            self.recorder.close()
+
+class ReplaySource(FrameSource):
+    """
+    Replays a recording made by FrameRecorder.
+
+    Frames are memory-mapped from disk. By default they are returned as fast as
+    they are requested; with realtime=True read() sleeps to reproduce the original
+    capture timing.
+
+    Args:
+        path (str): Recording directory.
+        realtime (bool): Reproduce the recorded frame timing.
+        loops (int): Number of times to play the recording.
+    """
+
+    def __init__(self, path: str, realtime: bool = False, loops: int = 1):
+        if loops < 1:
+            raise ValueError(f"loops must be at least 1, got {loops}")
+
+        frames_path = os.path.join(path, FRAMES_FILE)
+        if not os.path.exists(frames_path):
+            raise ValueError(f"Could not open recording {path}")
+
+        self.frames = np.load(frames_path, mmap_mode="r")
+        self.timestamps = np.load(os.path.join(path, TIMESTAMPS_FILE))
+        self.realtime = realtime
+        self.loops = loops
+        self._index = 0
+        self._loop = 0
+        self._start = None
+
+    def __len__(self):
+        return len(self.frames) * self.loops
+
+    def read(self):
+        if self._index >= len(self.frames):
+            self._loop += 1
+            if self._loop >= self.loops:
+                return False, None
+            self._index = 0
+            self._start = None
+
+        if self.realtime:
+            if self._start is None:
+                self._start = time.perf_counter()
+            delay = self.timestamps[self._index] - (time.perf_counter() - self._start)
+            if delay > 0:
+                time.sleep(delay)
+
+        # Copy out of the memory map so callers get an ordinary writable array
+        frame = np.array(self.frames[self._index])
+        self._index += 1
+        return True, frame
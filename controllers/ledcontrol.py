@@ -1,20 +1,45 @@
 import numpy as np
 import cv2
 import time
-from typing import Dict, List, Tuple, Optional, Callable
+from functools import lru_cache
+from typing import Dict, List, Tuple, Optional, Callable, NamedTuple
+import config
+from controllers.framesource import FrameSource, CameraSource, ScreenSource
 
-def get_led_colors_from_frame(frame, tv_width_cm, tv_height_cm, leds_per_meter):
+class SamplerPlan(NamedTuple):
     """
-    Calculate per-LED colors for all edges based on a single frame.
+    Precomputed sampling regions for one TV/LED geometry.
+
+    Attributes:
+        resize_width (int): Width frames are resized to before sampling.
+        resize_height (int): Height frames are resized to before sampling.
+        regions (dict): Per edge, a tuple of (y0, y1, x0, x1) regions in the resized frame,
+            one per LED.
+    """
+    resize_width: int
+    resize_height: int
+    regions: Dict[str, Tuple[Tuple[int, int, int, int], ...]]
+
+@lru_cache(maxsize=16)
+def build_sampler_plan(tv_width_cm: float, tv_height_cm: float, leds_per_meter: int,
+                       resize_width: int = config.FRAME_RESIZE_WIDTH,
+                       resize_height: int = config.FRAME_RESIZE_HEIGHT,
+                       strip_size: int = config.EDGE_STRIP_SIZE) -> SamplerPlan:
+    """
+    Calculate the sampling region of every LED for a given geometry.
+
+    Plans are cached, so calling this once per frame with unchanged arguments is cheap.
 
     Args:
-        frame (numpy.ndarray): Image frame as numpy array.
         tv_width_cm (float): TV width in centimeters.
         tv_height_cm (float): TV height in centimeters.
         leds_per_meter (int): Number of LEDs per meter.
+        resize_width (int): Width frames are resized to before sampling.
+        resize_height (int): Height frames are resized to before sampling.
+        strip_size (int): Pixels for edge sampling.
 
     Returns:
-        dict: Colors for each edge in order: {'top': [...], 'right': [...], 'bottom': [...], 'left': [...]}
+        SamplerPlan: Sampling regions for each edge.
     """
     # Calculate LED count per edge
     width_m = tv_width_cm / 100.0
@@ -23,60 +48,75 @@ def get_led_colors_from_frame(frame, tv_width_cm, tv_height_cm, leds_per_meter):
     leds_top_bottom = int(width_m * leds_per_meter)
     leds_left_right = int(height_m * leds_per_meter)
 
+    w, h = resize_width, resize_height
+
+    # Top and bottom edges
+    segment_width = max(1, w // leds_top_bottom) if leds_top_bottom else w
+    top, bottom = [], []
+    for i in range(leds_top_bottom):
+        start_x = i * segment_width
+        end_x = min((i + 1) * segment_width, w)
+        top.append((0, strip_size, start_x, end_x))
+        bottom.append((h - strip_size, h, start_x, end_x))
+
+    # Left and right edges
+    segment_height = max(1, h // leds_left_right) if leds_left_right else h
+    left, right = [], []
+    for i in range(leds_left_right):
+        start_y = i * segment_height
+        end_y = min((i + 1) * segment_height, h)
+        left.append((start_y, end_y, 0, strip_size))
+        right.append((start_y, end_y, w - strip_size, w))
+
+    regions = {'top': tuple(top), 'right': tuple(right), 'bottom': tuple(bottom), 'left': tuple(left)}
+    return SamplerPlan(resize_width, resize_height, regions)
+
+def get_led_colors_from_plan(frame, plan: SamplerPlan):
+    """
+    Calculate per-LED colors for all edges of a frame using a precomputed plan.
+
+    Args:
+        frame (numpy.ndarray): Image frame as numpy array.
+        plan (SamplerPlan): Plan from build_sampler_plan.
+
+    Returns:
+        dict: Colors for each edge in order: {'top': [...], 'right': [...], 'bottom': [...], 'left': [...]}
+    """
     # Convert BGR to RGB if needed
     if len(frame.shape) == 3 and frame.shape[2] == 3:
         frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     
     # Resize for performance
-    resized = cv2.resize(frame, (160, 90))
-    h, w, _ = resized.shape
-    strip_size = 10  # Pixels for edge sampling
+    resized = cv2.resize(frame, (plan.resize_width, plan.resize_height))
 
     # Helper function to average color
     def avg_color(region):
         avg = np.mean(region, axis=(0, 1))
         return tuple(map(int, avg))
 
-    # Process edges
-    colors = {'top': [], 'right': [], 'bottom': [], 'left': []}
+    colors = {}
+    for edge, regions in plan.regions.items():
+        colors[edge] = [avg_color(resized[y0:y1, x0:x1, :]) for y0, y1, x0, x1 in regions]
 
-    # Top edge
-    segment_width = max(1, w // leds_top_bottom)
-    top_strip = resized[0:strip_size, :, :]
-    for i in range(leds_top_bottom):
-        start_x = i * segment_width
-        end_x = min((i + 1) * segment_width, w)
-        seg = top_strip[:, start_x:end_x, :]
-        colors['top'].append(avg_color(seg))
-
-    # Bottom edge
-    bottom_strip = resized[h - strip_size:h, :, :]
-    for i in range(leds_top_bottom):
-        start_x = i * segment_width
-        end_x = min((i + 1) * segment_width, w)
-        seg = bottom_strip[:, start_x:end_x, :]
-        colors['bottom'].append(avg_color(seg))
+    return colors
 
-    # Left edge
-    segment_height = max(1, h // leds_left_right)
-    left_strip = resized[:, 0:strip_size, :]
-    for i in range(leds_left_right):
-        start_y = i * segment_height
-        end_y = min((i + 1) * segment_height, h)
-        seg = left_strip[start_y:end_y, :, :]
-        colors['left'].append(avg_color(seg))
+def get_led_colors_from_frame(frame, tv_width_cm, tv_height_cm, leds_per_meter):
+    """
+    Calculate per-LED colors for all edges based on a single frame.
 
-    # Right edge
-    right_strip = resized[:, w - strip_size:w, :]
-    for i in range(leds_left_right):
-        start_y = i * segment_height
-        end_y = min((i + 1) * segment_height, h)
-        seg = right_strip[start_y:end_y, :, :]
-        colors['right'].append(avg_color(seg))
+    Args:
+        frame (numpy.ndarray): Image frame as numpy array.
+        tv_width_cm (float): TV width in centimeters.
+        tv_height_cm (float): TV height in centimeters.
+        leds_per_meter (int): Number of LEDs per meter.
 
-    return colors
+    Returns:
+        dict: Colors for each edge in order: {'top': [...], 'right': [...], 'bottom': [...], 'left': [...]}
+    """
+    plan = build_sampler_plan(tv_width_cm, tv_height_cm, leds_per_meter)
+    return get_led_colors_from_plan(frame, plan)
 
-def get_led_colors(image_path, tv_width_cm, tv_height_cm, leds_per_meter):
+def get_led_colors(image_path, tv_width_cm, tv_height_cm, leds_per_meter, config_watcher=None):
     """
     Calculate per-LED colors for all edges based on an image.
 
@@ -85,6 +125,8 @@ def get_led_colors(image_path, tv_width_cm, tv_height_cm, leds_per_meter):
         tv_width_cm (float): TV width in centimeters.
         tv_height_cm (float): TV height in centimeters.
         leds_per_meter (int): Number of LEDs per meter.
+        config_watcher (Optional[ConfigWatcher]): If given, geometry is taken from the watcher's
+            current config and tv_width_cm, tv_height_cm and leds_per_meter are ignored.
 
     Returns:
         dict: Colors for each edge in order: {'top': [...], 'right': [...], 'bottom': [...], 'left': [...]}
@@ -94,11 +136,28 @@ def get_led_colors(image_path, tv_width_cm, tv_height_cm, leds_per_meter):
     if image is None:
         raise ValueError(f"Could not load image from {image_path}")
     
+    if config_watcher:
+        return get_led_colors_from_plan(image, config_watcher.current.plan)
     return get_led_colors_from_frame(image, tv_width_cm, tv_height_cm, leds_per_meter)
 
+def _sample_frame(frame, static_plan: SamplerPlan, config_watcher,
+                  color_callback: Callable[..., None]):
+    """
+    Sample one frame and pass the colors to the callback.
+
+    With a config watcher its current config is read exactly once, so the plan used
+    for sampling and the CompiledConfig handed to the callback are the same version
+    even if a reload happens in between.
+    """
+    if config_watcher:
+        current = config_watcher.current
+        color_callback(get_led_colors_from_plan(frame, current.plan), current)
+    else:
+        color_callback(get_led_colors_from_plan(frame, static_plan))
+
 def process_video(video_path: str, tv_width_cm: float, tv_height_cm: float, 
-                 leds_per_meter: int, color_callback: Callable[[Dict], None],
-                 target_fps: Optional[float] = None):
+                 leds_per_meter: int, color_callback: Callable[..., None],
+                 target_fps: Optional[float] = None, config_watcher=None):
     """
     Process a video file and call callback with LED colors for each frame.
 
@@ -107,8 +166,11 @@ def process_video(video_path: str, tv_width_cm: float, tv_height_cm: float,
         tv_width_cm (float): TV width in centimeters.
         tv_height_cm (float): TV height in centimeters.
         leds_per_meter (int): Number of LEDs per meter.
-        color_callback (Callable): Function to call with colors dict for each frame.
+        color_callback (Callable): Function to call with colors dict for each frame. With a
+            config_watcher it is called as color_callback(colors, compiled_config).
         target_fps (Optional[float]): Target FPS for playback. If None, uses video's native FPS.
+        config_watcher (Optional[ConfigWatcher]): Take geometry from the watcher's current config
+            on every frame instead of tv_width_cm, tv_height_cm and leds_per_meter.
     """
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
@@ -122,6 +184,8 @@ def process_video(video_path: str, tv_width_cm: float, tv_height_cm: float,
     print(f"Processing video: {video_path}")
     print(f"Original FPS: {original_fps:.2f}, Target FPS: {fps:.2f}")
 
+    static_plan = build_sampler_plan(tv_width_cm, tv_height_cm, leds_per_meter)
+
     try:
         while True:
             ret, frame = cap.read()
@@ -130,11 +194,8 @@ def process_video(video_path: str, tv_width_cm: float, tv_height_cm: float,
 
             start_time = time.time()
             
-            # Get LED colors for this frame
-            colors = get_led_colors_from_frame(frame, tv_width_cm, tv_height_cm, leds_per_meter)
-            
-            # Call the callback with colors
-            color_callback(colors)
+            # Get LED colors for this frame and call the callback with them
+            _sample_frame(frame, static_plan, config_watcher, color_callback)
             
             # Maintain target FPS
             elapsed = time.time() - start_time
@@ -146,8 +207,9 @@ def process_video(video_path: str, tv_width_cm: float, tv_height_cm: float,
         cap.release()
 
 def process_live_video(camera_index: int, tv_width_cm: float, tv_height_cm: float,
-                      leds_per_meter: int, color_callback: Callable[[Dict], None],
-                      target_fps: float = 30.0):
+                      leds_per_meter: int, color_callback: Callable[..., None],
+                      target_fps: float = 30.0, source: Optional[FrameSource] = None,
+                      show_preview: bool = True, config_watcher=None):
     """
     Process live video from camera and call callback with LED colors for each frame.
 
@@ -156,43 +218,45 @@ def process_live_video(camera_index: int, tv_width_cm: float, tv_height_cm: floa
         tv_width_cm (float): TV width in centimeters.
         tv_height_cm (float): TV height in centimeters.
         leds_per_meter (int): Number of LEDs per meter.
-        color_callback (Callable): Function to call with colors dict for each frame.
+        color_callback (Callable): Function to call with colors dict for each frame. With a
+            config_watcher it is called as color_callback(colors, compiled_config).
         target_fps (float): Target FPS for processing.
+        source (Optional[FrameSource]): Frame source to use instead of opening the camera,
+            e.g. a RecordingSource or ReplaySource.
+        show_preview (bool): Show the preview window.
+        config_watcher (Optional[ConfigWatcher]): Take geometry from the watcher's current config
+            on every frame instead of tv_width_cm, tv_height_cm and leds_per_meter.
     """
-    cap = cv2.VideoCapture(camera_index)
-    if not cap.isOpened():
-        raise ValueError(f"Could not open camera {camera_index}")
-
-    # Set camera properties for better performance
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    cap.set(cv2.CAP_PROP_FPS, target_fps)
+    opened_camera = source is None
+    if opened_camera:
+        source = CameraSource(camera_index, target_fps)
+        print(f"Starting live video processing from camera {camera_index}")
+        print("Press 'q' to quit")
 
+    static_plan = build_sampler_plan(tv_width_cm, tv_height_cm, leds_per_meter)
     frame_delay = 1.0 / target_fps
-    print(f"Starting live video processing from camera {camera_index}")
-    print("Press 'q' to quit")
 
     try:
         while True:
-            ret, frame = cap.read()
+            ret, frame = source.read()
             if not ret:
-                print("Failed to capture frame")
+                # An injected source (e.g. a replay) simply ran out of frames
+                if opened_camera:
+                    print("Failed to capture frame")
                 break
 
             start_time = time.time()
             
-            # Get LED colors for this frame
-            colors = get_led_colors_from_frame(frame, tv_width_cm, tv_height_cm, leds_per_meter)
-            
-            # Call the callback with colors
-            color_callback(colors)
-            
-            # Show preview window (optional)
-            cv2.imshow('Live Video - Press q to quit', frame)
+            # Get LED colors for this frame and call the callback with them
+            _sample_frame(frame, static_plan, config_watcher, color_callback)
             
-            # Check for quit key
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+            if show_preview:
+                # Show preview window (optional)
+                cv2.imshow('Live Video - Press q to quit', frame)
+                
+                # Check for quit key
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    break
             
             # Maintain target FPS
             elapsed = time.time() - start_time
@@ -201,12 +265,14 @@ def process_live_video(camera_index: int, tv_width_cm: float, tv_height_cm: floa
                 time.sleep(sleep_time)
 
     finally:
-        cap.release()
-        cv2.destroyAllWindows()
+        source.release()
+        if show_preview:
+            cv2.destroyAllWindows()
 
 def process_screen_capture(tv_width_cm: float, tv_height_cm: float,
-                          leds_per_meter: int, color_callback: Callable[[Dict], None],
-                          target_fps: float = 30.0, monitor_index: int = 0):
+                          leds_per_meter: int, color_callback: Callable[..., None],
+                          target_fps: float = 30.0, monitor_index: int = 0,
+                          source: Optional[FrameSource] = None, config_watcher=None):
     """
     Process screen capture and call callback with LED colors for each frame.
     Note: Requires additional packages like mss or pyautogui for screen capture.
@@ -215,48 +281,42 @@ def process_screen_capture(tv_width_cm: float, tv_height_cm: float,
         tv_width_cm (float): TV width in centimeters.
         tv_height_cm (float): TV height in centimeters.
         leds_per_meter (int): Number of LEDs per meter.
-        color_callback (Callable): Function to call with colors dict for each frame.
+        color_callback (Callable): Function to call with colors dict for each frame. With a
+            config_watcher it is called as color_callback(colors, compiled_config).
         target_fps (float): Target FPS for processing.
         monitor_index (int): Monitor index to capture (0 for primary).
+        source (Optional[FrameSource]): Frame source to use instead of capturing the screen,
+            e.g. a RecordingSource or ReplaySource.
+        config_watcher (Optional[ConfigWatcher]): Take geometry from the watcher's current config
+            on every frame instead of tv_width_cm, tv_height_cm and leds_per_meter.
     """
-    try:
-        import mss
-    except ImportError:
-        raise ImportError("Screen capture requires 'mss' package. Install with: pip install mss")
+    if source is None:
+        source = ScreenSource(monitor_index)
+        print(f"Capturing screen {monitor_index}: {source.monitor}")
+        print("Press Ctrl+C to stop")
 
+    static_plan = build_sampler_plan(tv_width_cm, tv_height_cm, leds_per_meter)
     frame_delay = 1.0 / target_fps
-    
-    with mss.mss() as sct:
-        monitors = sct.monitors
-        if monitor_index >= len(monitors):
-            raise ValueError(f"Monitor index {monitor_index} not available. Available monitors: {len(monitors)-1}")
-        
-        monitor = monitors[monitor_index + 1]  # monitors[0] is all monitors combined
-        print(f"Capturing screen {monitor_index}: {monitor}")
-        print("Press Ctrl+C to stop")
 
-        try:
-            while True:
-                start_time = time.time()
-                
-                # Capture screenshot
-                screenshot = sct.grab(monitor)
-                frame = np.array(screenshot)
-                
-                # Convert BGRA to RGB
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2RGB)
-                
-                # Get LED colors for this frame
-                colors = get_led_colors_from_frame(frame, tv_width_cm, tv_height_cm, leds_per_meter)
-                
-                # Call the callback with colors
-                color_callback(colors)
-                
-                # Maintain target FPS
-                elapsed = time.time() - start_time
-                sleep_time = max(0, frame_delay - elapsed)
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
-
-        except KeyboardInterrupt:
-            print("\nScreen capture stopped")
\ No newline at end of file
+    try:
+        while True:
+            start_time = time.time()
+            
+            # Capture screenshot (already converted to RGB by the source)
+            ret, frame = source.read()
+            if not ret:
+                break
+            
+            # Get LED colors for this frame and call the callback with them
+            _sample_frame(frame, static_plan, config_watcher, color_callback)
+            
+            # Maintain target FPS
+            elapsed = time.time() - start_time
+            sleep_time = max(0, frame_delay - elapsed)
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+
+    except KeyboardInterrupt:
+        print("\nScreen capture stopped")
+    finally:
+        source.release()
@@ -0,0 +1,381 @@
+"""
+Record-and-replay performance harness.
+
+Replays a recording made with controllers.framesource through the full LED pipeline
+at full speed, sends every frame as DDP to a local fake WLED receiver and reports
+latency and throughput. Because the frames come from disk instead of a camera or the
+screen, runs are reproducible and can be compared across changes.
+
+Usage:
+    python -m controllers.replaybench record camera recordings/session1 --frames 300
+    python -m controllers.replaybench replay recordings/session1 --loops 3
+"""
+
+import argparse
+import socket
+import struct
+import threading
+import time
+import numpy as np
+from typing import Dict, List, Optional
+
+import config
+from controllers.framesource import FrameSource, CameraSource, ScreenSource, FrameRecorder, ReplaySource
+from controllers.ledcontrol import process_live_video, process_screen_capture
+from controllers.configwatcher import CompiledConfig, ConfigWatcher
+
+# DDP protocol constants (as used by WLED)
+DDP_HEADER_LEN = 10
+DDP_MAX_DATA_LEN = 1440  # 480 RGB pixels per packet
+DDP_FLAGS_VER1 = 0x40
+DDP_FLAGS_PUSH = 0x01
+DDP_TYPE_RGB24 = 0x0B
+DDP_ID_DISPLAY = 0x01
+
+def colors_to_pixels(colors: Dict[str, List], led_order: List[str] = None,
+                     reverse_edges: List[str] = None) -> bytes:
+    """
+    Flatten per-edge LED colors into one RGB byte string in strip order.
+
+    Args:
+        colors (dict): Colors per edge as returned by get_led_colors_from_frame.
+        led_order (List[str]): Edge order along the strip. Defaults to config.LED_ORDER.
+        reverse_edges (List[str]): Edges wired in reverse. Defaults to config.REVERSE_EDGES.
+
+    Returns:
+        bytes: RGB data, 3 bytes per LED.
+    """
+    led_order = config.LED_ORDER if led_order is None else led_order
+    reverse_edges = config.REVERSE_EDGES if reverse_edges is None else reverse_edges
+
+    data = bytearray()
+    for edge in led_order:
+        edge_colors = colors[edge]
+        if edge in reverse_edges:
+            edge_colors = reversed(edge_colors)
+        for r, g, b in edge_colors:
+            data += bytes((r, g, b))
+    return bytes(data)
+
+def build_ddp_packets(pixels: bytes, sequence: int) -> List[bytes]:
+    """
+    Split RGB data into DDP packets. The push flag is set on the last packet.
+
+    Args:
+        pixels (bytes): RGB data, 3 bytes per LED.
+        sequence (int): Sequence number (1-15, 0 disables sequencing).
+
+    Returns:
+        List[bytes]: Packets ready to send.
+    """
+    packets = []
+    for offset in range(0, max(len(pixels), 1), DDP_MAX_DATA_LEN):
+        chunk = pixels[offset:offset + DDP_MAX_DATA_LEN]
+        flags = DDP_FLAGS_VER1
+        if offset + DDP_MAX_DATA_LEN >= len(pixels):
+            flags |= DDP_FLAGS_PUSH
+        header = struct.pack("!BBBBIH", flags, sequence & 0x0F, DDP_TYPE_RGB24,
+                             DDP_ID_DISPLAY, offset, len(chunk))
+        packets.append(header + chunk)
+    return packets
+
+class DDPSender:
+    """
+    Sends LED colors to a WLED device over DDP.
+
+    Args:
+        host (str): Device IP address.
+        port (int): DDP port.
+    """
+
+    def __init__(self, host: str, port: int = config.UDP_PORT):
+        self.address = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sequence = 0
+        self.send_times = []
+        self.send_sequences = []
+
+    def send(self, colors: Dict[str, List], compiled_config: Optional[CompiledConfig] = None):
+        """
+        Send one frame of LED colors.
+
+        Args:
+            colors (dict): Colors per edge.
+            compiled_config (Optional[CompiledConfig]): Config the colors were sampled with,
+                as passed by the process_* functions when a ConfigWatcher is used. Its strip
+                mapping is applied; without it config.LED_ORDER and config.REVERSE_EDGES are used.
+        """
+        # Taken on entry so the pipeline's processing time excludes packetizing and sending
+        self.send_times.append(time.perf_counter())
+        self.sequence = self.sequence % 15 + 1
+        self.send_sequences.append(self.sequence)
+        if compiled_config:
+            pixels = colors_to_pixels(colors, compiled_config.led_order, compiled_config.reverse_edges)
+        else:
+            pixels = colors_to_pixels(colors)
+        for packet in build_ddp_packets(pixels, self.sequence):
+            self.sock.sendto(packet, self.address)
+
+    def close(self):
+        self.sock.close()
+
+class FakeWLEDReceiver:
+    """
+    Local UDP receiver standing in for a WLED device.
+
+    Records the sequence number and arrival time of every DDP packet with the push
+    flag set, i.e. the moment a real device would latch a complete frame onto the strip.
+
+    Args:
+        host (str): Address to bind to.
+        port (int): Port to bind to. 0 picks a free port.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.settimeout(0.1)
+        self.address = self.sock.getsockname()
+        self.frames = []  # (sequence, arrival time) per pushed frame
+        self.packets = 0
+        self.bytes = 0
+        self.malformed = 0
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while self._running:
+            try:
+                data, _ = self.sock.recvfrom(DDP_HEADER_LEN + DDP_MAX_DATA_LEN)
+            except socket.timeout:
+                continue
+            now = time.perf_counter()
+            self.packets += 1
+            self.bytes += len(data)
+            if len(data) < DDP_HEADER_LEN or not data[0] & DDP_FLAGS_VER1:
+                self.malformed += 1
+                continue
+            if data[0] & DDP_FLAGS_PUSH:
+                self.frames.append((data[1] & 0x0F, now))
+
+    def wait_for(self, frames: int, timeout: float = 1.0):
+        """Wait until `frames` complete frames have arrived or the timeout expires."""
+        deadline = time.perf_counter() + timeout
+        while len(self.frames) < frames and time.perf_counter() < deadline:
+            time.sleep(0.001)
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+        self.sock.close()
+
+class TimedSource(FrameSource):
+    """Wraps a FrameSource and records the time each frame was handed to the pipeline."""
+
+    def __init__(self, source: FrameSource):
+        self.source = source
+        self.read_times = []
+
+    def read(self):
+        ret, frame = self.source.read()
+        if ret:
+            self.read_times.append(time.perf_counter())
+        return ret, frame
+
+    def release(self):
+        self.source.release()
+
+def record_session(path: str, mode: str = "camera", frames: int = 300,
+                   camera_index: int = 0, monitor_index: int = 0, target_fps: float = 30.0):
+    """
+    Record frames from a camera or the screen for later replay.
+
+    Args:
+        path (str): Recording directory.
+        mode (str): 'camera' or 'screen'.
+        frames (int): Number of frames to record.
+        camera_index (int): Camera index for camera mode.
+        monitor_index (int): Monitor index for screen mode.
+        target_fps (float): Capture FPS.
+    """
+    if mode == "camera":
+        source = CameraSource(camera_index, target_fps)
+    elif mode == "screen":
+        source = ScreenSource(monitor_index)
+    else:
+        raise ValueError(f"Unknown capture mode {mode}")
+
+    frame_delay = 1.0 / target_fps
+    print(f"Recording {frames} frames from {mode} to {path}")
+
+    with source, FrameRecorder(path) as recorder:
+        for _ in range(frames):
+            start_time = time.time()
+            ret, frame = source.read()
+            if not ret:
+                print("Failed to capture frame")
+                break
+            recorder.write(frame)
+
+            # Maintain target FPS
+            sleep_time = max(0, frame_delay - (time.time() - start_time))
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+
+def run_replay_benchmark(path: str, tv_width_cm: float = config.TV_WIDTH_CM,
+                         tv_height_cm: float = config.TV_HEIGHT_CM,
+                         leds_per_meter: int = config.LEDS_PER_METER,
+                         mode: str = "camera", loops: int = 1, realtime: bool = False,
+                         config_watcher: Optional[ConfigWatcher] = None) -> Dict:
+    """
+    Replay a recording through the LED pipeline and a fake WLED receiver.
+
+    Args:
+        path (str): Recording directory.
+        tv_width_cm (float): TV width in centimeters.
+        tv_height_cm (float): TV height in centimeters.
+        leds_per_meter (int): Number of LEDs per meter.
+        mode (str): Pipeline to drive, 'camera' (process_live_video) or 'screen'
+            (process_screen_capture).
+        loops (int): Number of times to play the recording.
+        realtime (bool): Reproduce the recorded frame timing instead of running at full speed.
+        config_watcher (Optional[ConfigWatcher]): Take geometry and strip mapping from a
+            watched config file, so reloads can be exercised during a replay.
+
+    Returns:
+        dict: Report with frame counts, throughput and latency percentiles in milliseconds.
+    """
+    source = TimedSource(ReplaySource(path, realtime=realtime, loops=loops))
+    receiver = FakeWLEDReceiver().start()
+    sender = DDPSender(*receiver.address)
+    # An infinite target FPS disables the pipeline's frame pacing
+    target_fps = float("inf")
+
+    try:
+        start = time.perf_counter()
+        if mode == "camera":
+            process_live_video(0, tv_width_cm, tv_height_cm, leds_per_meter, sender.send,
+                               target_fps, source=source, show_preview=False,
+                               config_watcher=config_watcher)
+        elif mode == "screen":
+            process_screen_capture(tv_width_cm, tv_height_cm, leds_per_meter, sender.send,
+                                   target_fps, source=source, config_watcher=config_watcher)
+        else:
+            raise ValueError(f"Unknown pipeline mode {mode}")
+        # Stop the clock before waiting on the receiver, so late or dropped
+        # datagrams do not count as pipeline time
+        elapsed = time.perf_counter() - start
+        receiver.wait_for(len(sender.send_times))
+    finally:
+        sender.close()
+        receiver.stop()
+
+    read_times = np.asarray(source.read_times)
+    send_times = np.asarray(sender.send_times)
+    # The callback runs once per read on the same thread, so reads and sends pair up by index
+    processing = (send_times - read_times[:len(send_times)]) * 1000.0
+
+    # Match received frames to sent frames by DDP sequence number so a dropped datagram
+    # is skipped instead of shifting every later sample. Assumes fewer than 15
+    # consecutive drops, since the sequence number wraps at 15.
+    matched, arrivals = [], []
+    index = 0
+    for sequence, arrival in receiver.frames:
+        while index < len(sender.send_sequences) and sender.send_sequences[index] != sequence:
+            index += 1
+        if index == len(sender.send_sequences):
+            break
+        matched.append(index)
+        arrivals.append(arrival)
+        index += 1
+    latency = (np.asarray(arrivals) - read_times[np.asarray(matched, dtype=int)]) * 1000.0
+
+    def summary(values):
+        if len(values) == 0:
+            return {}
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        return {'mean': float(np.mean(values)), 'p50': float(p50), 'p95': float(p95),
+                'p99': float(p99), 'max': float(np.max(values))}
+
+    return {
+        'recording': path,
+        'mode': mode,
+        'frames_read': len(read_times),
+        'frames_sent': len(send_times),
+        'frames_received': len(receiver.frames),
+        'frames_dropped': len(send_times) - len(matched),
+        'packets_received': receiver.packets,
+        'bytes_received': receiver.bytes,
+        'malformed_packets': receiver.malformed,
+        'elapsed_s': elapsed,
+        'throughput_fps': len(send_times) / elapsed if elapsed > 0 else 0.0,
+        'processing_ms': summary(processing),
+        'latency_ms': summary(latency),
+    }
+
+def print_report(report: Dict):
+    """Print a benchmark report."""
+    print("\n" + "=" * 50)
+    print(f"Replay Benchmark: {report['recording']} ({report['mode']})")
+    print("=" * 50)
+    print(f"Frames read/sent/received: {report['frames_read']}/{report['frames_sent']}/"
+          f"{report['frames_received']}")
+    if report['frames_dropped']:
+        print(f"WARNING: {report['frames_dropped']} frames were not received; "
+              f"latency covers matched frames only")
+    print(f"Packets received: {report['packets_received']} ({report['bytes_received']} bytes, "
+          f"{report['malformed_packets']} malformed)")
+    print(f"Elapsed: {report['elapsed_s']:.3f}s, Throughput: {report['throughput_fps']:.1f} FPS")
+    for name in ('processing_ms', 'latency_ms'):
+        stats = report[name]
+        if stats:
+            print(f"{name:14s} mean {stats['mean']:.3f}  p50 {stats['p50']:.3f}  "
+                  f"p95 {stats['p95']:.3f}  p99 {stats['p99']:.3f}  max {stats['max']:.3f}")
+
+def positive_int(value: str) -> int:
+    """argparse type for integers >= 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Record and replay LED pipeline benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record = subparsers.add_parser('record', help="Record frames from a camera or the screen")
+    record.add_argument('mode', choices=['camera', 'screen'])
+    record.add_argument('path')
+    record.add_argument('--frames', type=positive_int, default=300)
+    record.add_argument('--camera-index', type=int, default=0)
+    record.add_argument('--monitor-index', type=int, default=0)
+    record.add_argument('--fps', type=float, default=config.DEFAULT_FPS)
+
+    replay = subparsers.add_parser('replay', help="Replay a recording and report latency and throughput")
+    replay.add_argument('path')
+    replay.add_argument('--mode', choices=['camera', 'screen'], default='camera')
+    replay.add_argument('--loops', type=positive_int, default=1)
+    replay.add_argument('--realtime', action='store_true')
+    replay.add_argument('--config', help="JSON config file to watch and reload during the replay")
+
+    args = parser.parse_args(argv)
+    if args.command == 'record':
+        record_session(args.path, args.mode, args.frames, args.camera_index,
+                       args.monitor_index, args.fps)
+    elif args.config:
+        with ConfigWatcher(args.config) as watcher:
+            print_report(run_replay_benchmark(args.path, mode=args.mode, loops=args.loops,
+                                              realtime=args.realtime, config_watcher=watcher))
+    else:
+        print_report(run_replay_benchmark(args.path, mode=args.mode, loops=args.loops,
+                                          realtime=args.realtime))
+
+if __name__ == "__main__":
+    main()
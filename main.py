@@ -6,16 +6,17 @@ from controllers.ledcontrol import (
     process_live_video, 
     process_screen_capture
 )
+from controllers.configwatcher import ConfigWatcher
+from config import TV_WIDTH_CM, TV_HEIGHT_CM, LEDS_PER_METER, CONFIG_FILE
 
-# Configuration
-TV_WIDTH_CM = 55.0  # Adjust to your TV width
-TV_HEIGHT_CM = 31.0  # Adjust to your TV height
-LEDS_PER_METER = 60  # Adjust to your LED strip density
+# Geometry is reloaded from CONFIG_FILE while running; edit it instead of restarting
+config_watcher = None
 
-def print_colors(colors):
+def print_colors(colors, compiled_config=None):
     """
     Callback function to handle LED colors.
     Replace this with your actual LED control code.
+    compiled_config is the config the colors were sampled with (unused here).
     """
     print(f"\nLED Colors - Top: {len(colors['top'])}, Right: {len(colors['right'])}, "
           f"Bottom: {len(colors['bottom'])}, Left: {len(colors['left'])}")
@@ -43,7 +44,8 @@ def process_image(image_path):
     """Process a single image."""
     print(f"Processing image: {image_path}")
     try:
-        colors = get_led_colors(image_path, TV_WIDTH_CM, TV_HEIGHT_CM, LEDS_PER_METER)
+        colors = get_led_colors(image_path, TV_WIDTH_CM, TV_HEIGHT_CM, LEDS_PER_METER,
+                                config_watcher)
         print_colors(colors)
     except Exception as e:
         print(f"Error processing image: {e}")
@@ -53,7 +55,7 @@ def process_video_file(video_path, target_fps=None):
     print(f"Processing video: {video_path}")
     try:
         process_video(video_path, TV_WIDTH_CM, TV_HEIGHT_CM, LEDS_PER_METER, 
-                     print_colors, target_fps)
+                     print_colors, target_fps, config_watcher=config_watcher)
     except Exception as e:
         print(f"Error processing video: {e}")
 
@@ -62,7 +64,7 @@ def process_camera(camera_index=0, target_fps=30):
     print(f"Processing camera {camera_index}")
     try:
         process_live_video(camera_index, TV_WIDTH_CM, TV_HEIGHT_CM, LEDS_PER_METER,
-                          print_colors, target_fps)
+                          print_colors, target_fps, config_watcher=config_watcher)
     except Exception as e:
         print(f"Error processing camera: {e}")
 
@@ -71,12 +73,16 @@ def process_screen(monitor_index=0, target_fps=30):
     print(f"Processing screen capture from monitor {monitor_index}")
     try:
         process_screen_capture(TV_WIDTH_CM, TV_HEIGHT_CM, LEDS_PER_METER,
-                              print_colors, target_fps, monitor_index)
+                              print_colors, target_fps, monitor_index,
+                              config_watcher=config_watcher)
     except Exception as e:
         print(f"Error processing screen: {e}")
 
 def main():
     """Main function with interactive menu."""
+    global config_watcher
+    config_watcher = ConfigWatcher(CONFIG_FILE).start()
+
     while True:
         print("\n" + "="*50)
         print("LED Control System")
@@ -125,6 +131,7 @@ def main():
             
         elif choice == '5':
             print("Goodbye!")
+            config_watcher.stop()
             break
             
         else: